@@ -1,15 +1,25 @@
 """ Aplicación de Interfaz de Línea de Comandos (CLI) utilizando la biblioteca Click de Python """
-from typing import Optional
 import click
 import requests
 import json
-from datetime import datetime
+import orjson
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 import csv
 from io import StringIO
-from typing import List, Dict, Any
+from typing import List, Iterable, Iterator, Optional, Tuple, Union
 import logging
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
+from requests_cache import CachedSession, DO_NOT_CACHE
+import os
 import re
+import codecs
+from itertools import chain
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -19,8 +29,119 @@ logger = logging.getLogger(__name__)
 FECHA_INICIO = datetime(2008, 2, 1)
 FECHA_FIN = datetime(2021, 6, 30)
 
+# Límites (año, mes) y descripción del rango, calculados una sola vez
+_LO = (FECHA_INICIO.year, FECHA_INICIO.month)
+_HI = (FECHA_FIN.year, FECHA_FIN.month)
+_RANGO_STR = f"El programa se emitió desde {FECHA_INICIO:%B %Y} hasta {FECHA_FIN:%B %Y}"
+
+# Todos los (mes, año) del rango válido, generados a partir de un índice de meses
+_INICIO_IDX = FECHA_INICIO.year * 12 + FECHA_INICIO.month - 1
+_FIN_IDX = FECHA_FIN.year * 12 + FECHA_FIN.month - 1
+MESES = [(i % 12 + 1, i // 12) for i in range(_INICIO_IDX, _FIN_IDX + 1)]
+
 BASE_URL = "https://www.rtve.es/play/audios/moduloRadio/1936/emisiones"
 
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+    # Compresiones que urllib3 sabe descomprimir (br solo si brotli está instalado)
+    'Accept-Encoding': requests.utils.DEFAULT_ACCEPT_ENCODING,
+}
+
+# Número de meses consultados en paralelo al buscar un episodio
+MAX_WORKERS_BUSQUEDA = 8
+
+# Páginas de un mismo mes que se piden a la vez (el total no se conoce de antemano)
+PAGINAS_POR_LOTE = 4
+
+# Tiempo máximo (segundos) de conexión y lectura de cada petición
+TIMEOUT = 30
+
+# Reintentos ante errores transitorios: espera exponencial con tope de 30 s,
+# multiplicada por un jitter aleatorio de (1 + U(0, JITTER))
+MAX_REINTENTOS = 3
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 30.0
+JITTER = 0.5
+
+def _con_jitter(espera: float) -> float:
+    """
+    Aplica el jitter multiplicativo a una espera de reintento.
+    
+    Args:
+        espera: Espera exponencial sin jitter, en segundos
+        
+    Returns:
+        float: Espera con jitter, limitada a ESPERA_MAXIMA
+    """
+    return min(ESPERA_MAXIMA, espera * (1 + random.uniform(0, JITTER)))
+
+class _RetryConJitter(Retry):
+    """Retry de urllib3 con el mismo jitter multiplicativo que la descarga.
+
+    El backoff_jitter de urllib3 suma entre 0 y JITTER segundos, en lugar de
+    escalar la espera.
+    """
+    def get_backoff_time(self) -> float:
+        return _con_jitter(super().get_backoff_time())
+
+# Tamaño de bloque al escribir los audios descargados
+CHUNK_DESCARGA = 256 * 1024
+
+# Caché en disco de los listados mensuales (el archivo 2008-2021 ya no cambia).
+# Al caducar, requests-cache revalida con ETag/Last-Modified y un 304 reutiliza
+# la respuesta guardada. Se desactiva con DISCOCLI_CACHE=0, por ejemplo para
+# el comando analizar.
+CACHE_ACTIVA = os.environ.get("DISCOCLI_CACHE", "1") != "0"
+CACHE_PATH = os.path.expanduser("~/.cache/discocli/http")
+CACHE_EXPIRACION = timedelta(days=30)
+
+# Sesión HTTP compartida: reutiliza las conexiones (keep-alive) entre peticiones.
+# El pool admite todas las peticiones simultáneas de una búsqueda completa.
+if CACHE_ACTIVA:
+    # Solo se cachean los listados; los audios no deben acabar en la base SQLite
+    SESSION = CachedSession(cache_name=CACHE_PATH, backend="sqlite",
+                            expire_after=DO_NOT_CACHE, allowable_methods=["GET"],
+                            urls_expire_after={f"{BASE_URL.split('://', 1)[1]}*": CACHE_EXPIRACION})
+else:
+    SESSION = requests.Session()
+SESSION.headers.update(DEFAULT_HEADERS)
+retry = _RetryConJitter(total=MAX_REINTENTOS, backoff_factor=ESPERA_BASE, backoff_max=ESPERA_MAXIMA,
+                       status_forcelist=[429, 500, 502, 503, 504],
+                       allowed_methods=["GET"], respect_retry_after_header=True)
+adapter = requests.adapters.HTTPAdapter(pool_connections=4,
+                                        pool_maxsize=MAX_WORKERS_BUSQUEDA * PAGINAS_POR_LOTE,
+                                        max_retries=retry)
+SESSION.mount("https://", adapter)
+
+# Columnas del formato CSV, en orden
+FIELDNAMES = ("id", "titulo", "url", "fecha", "duracion", "descripcion")
+
+# Campos mostrados en el formato texto, en orden, y separador entre episodios
+CAMPOS_TEXTO = (("Título", "titulo"), ("Fecha", "fecha"), ("Duración", "duracion"),
+                ("Descripción", "descripcion"), ("URL", "url"))
+SEPARADOR = "-" * 40
+
+# Juego de caracteres declarado en el <meta> del documento
+_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+# Expresión para extraer el idAsset del atributo data-setup sin decodificar el JSON
+_ID_RE = re.compile(r'"idAsset"\s*:\s*"?(\d+)"?')
+
+# Expresión para extraer el número de episodio del título
+_NUM_RE = re.compile(r'^(\d+\.?\d*)')
+
+@dataclass(slots=True)
+class Episodio:
+    """Datos de un episodio del programa extraídos del listado de RTVE."""
+    id: str = ""
+    titulo: str = ""
+    url: str = ""
+    fecha: str = ""
+    duracion: str = ""
+    descripcion: str = ""
+
 def validar_fecha(mes: int, anio: int) -> bool:
     """
     Valida si la fecha está dentro del rango de emisión del programa.
@@ -32,8 +153,7 @@ def validar_fecha(mes: int, anio: int) -> bool:
     Returns:
         bool: True si la fecha es válida, False en caso contrario
     """
-    fecha = datetime(anio, mes, 1)
-    return FECHA_INICIO <= fecha <= FECHA_FIN
+    return _LO <= (anio, mes) <= _HI
 
 def obtener_rango_fechas_valido() -> str:
     """
@@ -42,8 +162,34 @@ def obtener_rango_fechas_valido() -> str:
     Returns:
         str: Descripción del rango de fechas válido
     """
-    return (f"El programa se emitió desde {FECHA_INICIO.strftime('%B %Y')} "
-            f"hasta {FECHA_FIN.strftime('%B %Y')}")
+    return _RANGO_STR
+
+def _html_respuesta(response: requests.Response) -> Union[bytes, str]:
+    """
+    Prepara el cuerpo de una respuesta para LexborHTMLParser.
+    
+    lexbor interpreta los bytes siempre como UTF-8, así que solo se le pasan
+    los bytes sin decodificar cuando el juego de caracteres (de la cabecera
+    Content-Type o, en su defecto, del <meta charset>) es UTF-8.
+    
+    Args:
+        response: Respuesta HTTP con la página HTML
+        
+    Returns:
+        Los bytes de la respuesta o el texto ya decodificado
+    """
+    if 'charset' in response.headers.get('Content-Type', '').lower():
+        charset = response.encoding
+    else:
+        match = _CHARSET_RE.search(response.content[:2048])
+        charset = match.group(1).decode('ascii') if match else 'utf-8'
+    
+    try:
+        if codecs.lookup(charset).name == 'utf-8':
+            return response.content
+        return response.content.decode(charset, errors='replace')
+    except LookupError:
+        return response.text
 
 def analizar_estructura_api() -> None:
     """
@@ -51,162 +197,273 @@ def analizar_estructura_api() -> None:
     Realiza peticiones de prueba y registra la estructura de la respuesta.
     """
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-        }
-        
         # Obtener un mes de ejemplo dentro del rango válido
         url = f"{BASE_URL}?month=3&year=2020&search=&page=1"
-        response = requests.get(url, headers=headers)
+        response = SESSION.get(url, timeout=TIMEOUT)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = LexborHTMLParser(_html_respuesta(response))
         # Analizar un elemento de ejemplo
-        item = soup.select_one('li.elem_')
+        item = tree.css_first('li.elem_')
         if item:
             logger.info("=== Análisis detallado de un elemento de episodio ===")
             # Mostrar todos los atributos del elemento
-            logger.info(f"Atributos del elemento: {item.attrs}")
+            logger.info("Atributos del elemento: %s", item.attributes)
             
             # Analizar data-setup
-            data_setup = json.loads(item.get('data-setup', '{}'))
-            logger.info(f"Contenido de data-setup: {json.dumps(data_setup, indent=2)}")
-            
-            # Buscar elementos específicos
-            for elem in item.select('[class]'):
-                logger.info(f"Elemento con clase '{elem.get('class')}': {elem.text.strip()}")
-                logger.info(f"Atributos: {elem.attrs}")
+            data_setup = json.loads(item.attributes.get('data-setup') or '{}')
+            # El volcado con sangría y el recorrido de los nodos solo se hacen
+            # si se van a mostrar
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Contenido de data-setup: %s", json.dumps(data_setup, indent=2))
+                
+                # Buscar elementos específicos
+                for elem in item.css('[class]'):
+                    logger.info("Elemento con clase '%s': %s", elem.attributes.get('class'), elem.text().strip())
+                    logger.info("Atributos: %s", elem.attributes)
             
     except Exception as e:
-        logger.error(f"Error en el análisis: {str(e)}")
+        logger.error("Error en el análisis: %s", e)
 
-def obtener_episodios(mes: int, anio: int) -> List[Dict[str, Any]]:
+def _total_paginas(tree: LexborHTMLParser) -> Optional[int]:
     """
-    Obtiene los episodios para un mes y año específicos.
+    Extrae el número total de páginas del paginador de un listado.
+    
+    Args:
+        tree: Página de listado ya analizada
+        
+    Returns:
+        Número total de páginas o None si no hay paginador reconocible
+    """
+    total_elem = tree.css_first('.paginacion .total')
+    if total_elem:
+        # "Página 1 de 5": el total es el último número del texto
+        numeros = re.findall(r'\d+', total_elem.text())
+        if numeros:
+            return int(numeros[-1])
+    
+    # El último enlace numérico del paginador apunta a la última página
+    numeros = [int(a.text(strip=True)) for a in tree.css('.paginacion a')
+               if a.text(strip=True).isdigit()]
+    return max(numeros) if numeros else None
+
+def _obtener_pagina(mes: int, anio: int, page: int) -> Tuple[List[Episodio], bool, Optional[int]]:
+    """
+    Descarga y analiza una página del listado de episodios de un mes.
     
     Args:
         mes: Número del mes (1-12)
         anio: Año a consultar
+        page: Número de página (empezando en 1)
         
     Returns:
-        Lista de episodios con su información
+        Tupla con los episodios de la página, si existe una página siguiente
+        y el total de páginas según el paginador (None si no se reconoce)
+        
+    Raises:
+        requests.RequestException: Si falla la petición HTTP
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-    }
+    url = f"{BASE_URL}?month={mes}&year={anio}&search=&page={page}"
+    response = SESSION.get(url, timeout=TIMEOUT)
+    response.raise_for_status()
+    tree = LexborHTMLParser(_html_respuesta(response))
     
     episodios = []
-    page = 1
-    while True:
-        url = f"{BASE_URL}?month={mes}&year={anio}&search=&page={page}"
+    for item in tree.css('li.elem_'):
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            data_setup = item.attributes.get('data-setup') or ''
             
-            items = soup.select('li.elem_')
-            if not items:
-                break
-                
-            for item in items:
-                try:
-                    data_setup = json.loads(item.get('data-setup', '{}'))
-                    
-                    # Extraer título y número de episodio
-                    titulo_elem = item.select_one('.maintitle')
-                    titulo = titulo_elem.text.strip() if titulo_elem else data_setup.get('title', 'Sin título')
-                    
-                    # Extraer fecha completa
-                    fecha_elem = item.select_one('.datemi')
-                    fecha = fecha_elem.get('aria-label', '').replace('Fecha de Emisión: ', '') if fecha_elem else ''
-                    
-                    # Extraer duración
-                    duracion_elem = item.select_one('.duration')
-                    duracion = duracion_elem.get('aria-label', '').replace('Duración: ', '') if duracion_elem else ''
-                    
-                    # Extraer URL completa
-                    url_elem = item.select_one('.goto_media')
-                    url_episodio = url_elem.get('href', '') if url_elem else ''
-                    
-                    # Extraer ID
-                    id_asset = data_setup.get('idAsset', '')
-                    
-                    episodio = {
-                        "id": id_asset,
-                        "titulo": titulo,
-                        "url": url_episodio,
-                        "fecha": fecha,
-                        "duracion": duracion
-                    }
-                    
-                    # Extraer descripción si existe
-                    desc_elem = item.select_one('.description')
-                    if desc_elem:
-                        episodio["descripcion"] = desc_elem.text.strip()
-                    
-                    episodios.append(episodio)
-                    
-                except (json.JSONDecodeError, AttributeError) as e:
-                    logger.warning(f"Error al procesar episodio: {str(e)}")
-                    continue
+            # Extraer título y número de episodio; el JSON de data-setup
+            # solo se decodifica si falta el título en el HTML
+            titulo_elem = item.css_first('.maintitle')
+            if titulo_elem:
+                titulo = titulo_elem.text().strip()
+            else:
+                titulo = orjson.loads(data_setup or '{}').get('title', 'Sin título')
             
-            if not soup.select('.siguiente'):
-                break
-                
-            page += 1
+            # Extraer fecha completa
+            fecha_elem = item.css_first('.datemi')
+            fecha = (fecha_elem.attributes.get('aria-label') or '').replace('Fecha de Emisión: ', '') if fecha_elem else ''
             
-        except requests.RequestException as e:
-            logger.error(f"Error al obtener la página {page}: {str(e)}")
-            break
+            # Extraer duración
+            duracion_elem = item.css_first('.duration')
+            duracion = (duracion_elem.attributes.get('aria-label') or '').replace('Duración: ', '') if duracion_elem else ''
+            
+            # Extraer URL completa
+            url_elem = item.css_first('.goto_media')
+            url_episodio = (url_elem.attributes.get('href') or '') if url_elem else ''
+            
+            # Extraer ID
+            match = _ID_RE.search(data_setup)
+            id_asset = match.group(1) if match else ''
+            
+            # Extraer descripción si existe
+            desc_elem = item.css_first('.description')
+            descripcion = desc_elem.text().strip() if desc_elem else ''
+            
+            episodios.append(Episodio(id=id_asset, titulo=titulo, url=url_episodio,
+                                      fecha=fecha, duracion=duracion, descripcion=descripcion))
+            
+        except (orjson.JSONDecodeError, AttributeError) as e:
+            logger.warning("Error al procesar episodio: %s", e)
+            continue
+        
+    hay_siguiente = tree.css_first('.siguiente') is not None
+    total_paginas = _total_paginas(tree)
+    
+    return episodios, hay_siguiente, total_paginas
+
+def iter_episodios(mes: int, anio: int) -> Iterator[Episodio]:
+    """
+    Genera los episodios de un mes y año específicos a medida que se descargan.
+    
+    Se siguen pidiendo páginas mientras la última obtenida enlace a la
+    siguiente. Las páginas que el paginador anuncia se piden en paralelo en
+    lotes de hasta PAGINAS_POR_LOTE (puede mostrar solo una ventana de
+    páginas o no ser fiable); sin paginador, se piden de una en una.
+    
+    Args:
+        mes: Número del mes (1-12)
+        anio: Año a consultar
+        
+    Yields:
+        Episodios con su información, en orden de página
+    """
+    try:
+        items, hay_siguiente, total_paginas = _obtener_pagina(mes, anio, 1)
+    except requests.RequestException as e:
+        logger.error("Error al obtener la página 1: %s", e)
+        return
+    yield from items
+    
+    page = 2
+    with ThreadPoolExecutor(max_workers=PAGINAS_POR_LOTE) as ex:
+        while hay_siguiente:
+            # Solo se adelantan páginas que el paginador dice que existen, y como
+            # mucho PAGINAS_POR_LOTE por ronda (su total podría no ser fiable).
+            # Sin total se sigue el enlace de una en una, para no pedir ni
+            # guardar en la caché páginas vacías tras la última.
+            if total_paginas is not None and total_paginas >= page:
+                ultima = min(total_paginas, page + PAGINAS_POR_LOTE - 1)
+            else:
+                ultima = page
+            lote = [ex.submit(_obtener_pagina, mes, anio, p) for p in range(page, ultima + 1)]
+            # Los resultados se recorren en orden de página
+            try:
+                for offset, fut in enumerate(lote):
+                    try:
+                        items, hay_siguiente, total_pagina = fut.result()
+                    except requests.RequestException as e:
+                        logger.error("Error al obtener la página %d: %s", page + offset, e)
+                        return
+                    
+                    yield from items
+                    if total_pagina is not None:
+                        total_paginas = max(total_paginas or 0, total_pagina)
+                    if not hay_siguiente:
+                        break
+            finally:
+                # Descartar las páginas del lote que aún no han empezado
+                for pendiente in lote:
+                    pendiente.cancel()
+            
+            page = ultima + 1
+
+def obtener_episodios(mes: int, anio: int) -> List[Episodio]:
+    """
+    Obtiene los episodios para un mes y año específicos.
+    
+    Args:
+        mes: Número del mes (1-12)
+        anio: Año a consultar
+        
+    Returns:
+        Lista de episodios con su información
+    """
+    return list(iter_episodios(mes, anio))
+
+def _lineas_texto(episodios: Iterable[Episodio]) -> Iterator[str]:
+    """
+    Genera las líneas del formato texto, sin salto de línea final.
+    
+    Args:
+        episodios: Episodios a formatear
+        
+    Yields:
+        Cada línea de la salida
+    """
+    for ep in episodios:
+        for etiqueta, clave in CAMPOS_TEXTO:
+            valor = getattr(ep, clave)
+            if valor:
+                yield f"{etiqueta}: {valor}"
+        yield SEPARADOR
+
+def _filas_csv(episodios: Iterable[Episodio]) -> Iterator[str]:
+    """
+    Genera las filas del formato CSV, incluida la cabecera si hay episodios.
     
-    return episodios
+    Args:
+        episodios: Episodios a formatear
+        
+    Yields:
+        Cada fila ya escrita, con su terminador de línea
+    """
+    output = StringIO()
+    writer = csv.writer(output)
+    for i, ep in enumerate(episodios):
+        if i == 0:
+            writer.writerow(FIELDNAMES)
+        writer.writerow(tuple(getattr(ep, k) for k in FIELDNAMES))
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
 
-def formatear_salida(episodios: List[Dict[str, Any]], formato: str) -> str:
+def formatear_salida(episodios: Iterable[Episodio], formato: str) -> str:
     """
-    Formatea la lista de episodios según el formato especificado.
+    Formatea los episodios según el formato especificado.
     
     Args:
-        episodios: Lista de episodios a formatear
+        episodios: Episodios a formatear (lista o cualquier iterable)
         formato: Formato deseado (json, csv, texto)
         
     Returns:
         String con los datos formateados
     """
     if formato == "json":
-        return json.dumps(episodios, indent=2, ensure_ascii=False)
+        return orjson.dumps(list(episodios), option=orjson.OPT_INDENT_2).decode()
     
     elif formato == "csv":
-        output = StringIO()
-        if episodios:
-            writer = csv.DictWriter(output, fieldnames=episodios[0].keys())
-            writer.writeheader()
-            writer.writerows(episodios)
-        return output.getvalue()
+        return "".join(_filas_csv(episodios))
     
     else:  # formato texto
-        resultado = []
-        for ep in episodios:
-            resultado.append(f"Título: {ep['titulo']}")
-            if ep.get('fecha'):
-                resultado.append(f"Fecha: {ep['fecha']}")
-            if ep.get('duracion'):
-                resultado.append(f"Duración: {ep['duracion']}")
-            if ep.get('programa'):
-                resultado.append(f"Programa: {ep['programa']}")
-            if ep.get('emisora'):
-                resultado.append(f"Emisora: {ep['emisora']}")
-            if ep.get('descripcion'):
-                resultado.append(f"Descripción: {ep['descripcion']}")
-            if ep.get('url'):
-                resultado.append(f"URL: {ep['url']}")
-            resultado.append("-" * 40)
-        return "\n".join(resultado)
-
-def buscar_episodio_por_numero(numero: str) -> Dict[str, Any]:
+        return "\n".join(_lineas_texto(episodios))
+
+def _buscar_en_episodios(episodios: Iterable[Episodio], numero_normalizado: str) -> Optional[Episodio]:
+    """
+    Busca entre los episodios de un mes el que tiene el número indicado.
+    
+    Args:
+        episodios: Episodios de un mes
+        numero_normalizado: Número del episodio sin puntos ni espacios
+        
+    Returns:
+        Primer episodio cuyo título empieza por ese número o None
+    """
+    for episodio in episodios:
+        titulo = episodio.titulo
+        # Extraer el número del título usando regex
+        match = _NUM_RE.match(titulo)
+        if match:
+            numero_episodio = match.group(1).replace('.', '')
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Comparando %s con %s del título: %s",
+                             numero_normalizado, numero_episodio, titulo)
+            if numero_episodio == numero_normalizado:
+                return episodio
+    return None
+
+def buscar_episodio_por_numero(numero: str) -> Optional[Episodio]:
     """
     Busca un episodio específico por su número.
     
@@ -214,34 +471,40 @@ def buscar_episodio_por_numero(numero: str) -> Dict[str, Any]:
         numero: Número del episodio (ejemplo: '10939')
         
     Returns:
-        Dict con la información del episodio o None si no se encuentra
+        Episodio encontrado o None si no se encuentra
     """
     # Normalizar el número (quitar puntos y espacios)
     numero_normalizado = numero.replace('.', '').strip()
-    logger.info(f"Buscando episodio número: {numero_normalizado}")
+    logger.info("Buscando episodio número: %s", numero_normalizado)
     
-    # Iteramos por los meses del rango válido
-    fecha_actual = FECHA_INICIO
-    while fecha_actual <= FECHA_FIN:
-        logger.info(f"Buscando en {fecha_actual.strftime('%B %Y')}...")
-        episodios = obtener_episodios(fecha_actual.month, fecha_actual.year)
-        
-        for episodio in episodios:
-            titulo = episodio['titulo']
-            # Extraer el número del título usando regex
-            match = re.match(r'(\d+\.?\d*)', titulo)
-            if match:
-                numero_episodio = match.group(1).replace('.', '')
-                logger.info(f"Comparando {numero_normalizado} con {numero_episodio} del título: {titulo}")
-                if numero_episodio == numero_normalizado:
-                    logger.info(f"¡Encontrado! Episodio: {titulo}")
-                    return episodio
-        
-        # Avanzar al siguiente mes
-        if fecha_actual.month == 12:
-            fecha_actual = fecha_actual.replace(year=fecha_actual.year + 1, month=1)
-        else:
-            fecha_actual = fecha_actual.replace(month=fecha_actual.month + 1)
+    # Los meses del rango válido se consultan en paralelo. Se devuelve la
+    # coincidencia del mes más antiguo, así que solo se termina cuando todos
+    # los meses anteriores a la mejor coincidencia ya se han revisado.
+    revisados = [False] * len(MESES)
+    primer_pendiente = 0
+    mejor = None
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS_BUSQUEDA) as ex:
+        futures = {ex.submit(obtener_episodios, m, y): i for i, (m, y) in enumerate(MESES)}
+        try:
+            for fut in as_completed(futures):
+                indice = futures[fut]
+                mes, anio = MESES[indice]
+                logger.info("Revisado %d/%d", mes, anio)
+                
+                episodio = _buscar_en_episodios(fut.result(), numero_normalizado)
+                if episodio and (mejor is None or indice < mejor[0]):
+                    mejor = (indice, episodio)
+                
+                revisados[indice] = True
+                while primer_pendiente < len(MESES) and revisados[primer_pendiente]:
+                    primer_pendiente += 1
+                
+                if mejor and mejor[0] < primer_pendiente:
+                    logger.info("¡Encontrado! Episodio: %s", mejor[1].titulo)
+                    return mejor[1]
+        finally:
+            # Al encontrarlo, ante un error o con Ctrl-C, no esperar a los meses pendientes
+            ex.shutdown(wait=False, cancel_futures=True)
     
     logger.info("No se encontró el episodio después de buscar en todo el rango de fechas")
     return None
@@ -270,14 +533,12 @@ def descargar_episodio(url: str, numero: str) -> str:
         Ruta al archivo descargado
     """
     try:
+        # Solo el Accept difiere de las cabeceras por defecto de la sesión
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'audio/webm,audio/ogg,audio/wav,audio/*;q=0.9,application/ogg;q=0.7,video/*;q=0.6,*/*;q=0.5',
-            'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
         }
         
         # Crear directorio de descargas si no existe
-        import os
         download_dir = os.path.expanduser("~/Downloads/discopolis")
         os.makedirs(download_dir, exist_ok=True)
         
@@ -287,26 +548,49 @@ def descargar_episodio(url: str, numero: str) -> str:
         
         # Si ya existe el archivo, no lo descargamos de nuevo
         if os.path.exists(filepath):
-            logger.info(f"El episodio ya está descargado en: {filepath}")
+            logger.info("El episodio ya está descargado en: %s", filepath)
             return filepath
             
-        # Descargar el archivo
-        with requests.get(url, headers=headers, stream=True) as r:
-            r.raise_for_status()
-            total = int(r.headers.get('content-length', 0))
-            
-            with open(filepath, 'wb') as f:
-                with click.progressbar(length=total, label='Descargando episodio') as bar:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            bar.update(len(chunk))
+        # Descargar el archivo. Los cortes a mitad de descarga se reintentan
+        # desde el principio; los fallos de conexión ya los reintenta el
+        # adaptador de la sesión y los errores 4xx no se reintentan.
+        try:
+            for intento in range(MAX_REINTENTOS + 1):
+                try:
+                    with SESSION.get(url, headers=headers, stream=True, timeout=TIMEOUT) as r:
+                        r.raise_for_status()
+                        total = int(r.headers.get('content-length', 0))
+                        
+                        # Se lee directamente de urllib3 en bloques grandes
+                        r.raw.decode_content = True
+                        with open(filepath, 'wb') as f:
+                            with click.progressbar(length=total, label='Descargando episodio') as bar:
+                                while True:
+                                    buf = r.raw.read(CHUNK_DESCARGA)
+                                    if not buf:
+                                        break
+                                    f.write(buf)
+                                    bar.update(len(buf))
+                    break
+                except (requests.exceptions.ChunkedEncodingError,
+                        ProtocolError, ReadTimeoutError) as e:
+                    if intento == MAX_REINTENTOS:
+                        raise
+                    espera = _con_jitter(ESPERA_BASE * 2 ** intento)
+                    logger.warning("Intento %d de descarga fallido (%s); reintentando en %.1f s",
+                                   intento + 1, e, espera)
+                    time.sleep(espera)
+        except BaseException:
+            # No dejar un MP3 a medias que la próxima ejecución daría por descargado
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            raise
                             
-        logger.info(f"Episodio descargado en: {filepath}")
+        logger.info("Episodio descargado en: %s", filepath)
         return filepath
         
     except Exception as e:
-        logger.error(f"Error al descargar el episodio: {str(e)}")
+        logger.error("Error al descargar el episodio: %s", e)
         raise
 
 @click.group()
@@ -341,13 +625,22 @@ def listar(mes: int, anio: int, formato: str) -> None:
             click.echo(obtener_rango_fechas_valido(), err=True)
             return
 
-        episodios = obtener_episodios(mes, anio)
-        if not episodios:
+        episodios = iter_episodios(mes, anio)
+        primero = next(episodios, None)
+        if primero is None:
             click.echo(f"No se encontraron episodios para {mes}/{anio}")
             return
-            
-        resultado = formatear_salida(episodios, formato)
-        click.echo(resultado)
+        episodios = chain([primero], episodios)
+        
+        # JSON necesita la lista completa; texto y CSV se muestran según llegan
+        if formato == "json":
+            click.echo(formatear_salida(episodios, formato))
+        elif formato == "csv":
+            for fila in _filas_csv(episodios):
+                click.echo(fila, nl=False)
+        else:
+            for linea in _lineas_texto(episodios):
+                click.echo(linea)
     except Exception as e:
         click.echo(f"Error al obtener los episodios: {str(e)}", err=True)
 
@@ -385,13 +678,13 @@ def reproducir(numero: str, debug: bool) -> None:
             click.echo(f"No se encontró el episodio número {numero}")
             return
             
-        click.echo(f"\nEncontrado: {episodio['titulo']}")
-        click.echo(f"Fecha: {episodio['fecha']}")
-        click.echo(f"Duración: {episodio['duracion']}")
-        click.echo(f"URL: {episodio['url']}\n")
+        click.echo(f"\nEncontrado: {episodio.titulo}")
+        click.echo(f"Fecha: {episodio.fecha}")
+        click.echo(f"Duración: {episodio.duracion}")
+        click.echo(f"URL: {episodio.url}\n")
         
         # Obtener URL del episodio
-        url = obtener_url_audio(episodio['url'])
+        url = obtener_url_audio(episodio.url)
         
         click.echo("Abriendo episodio en el navegador web...")
         import webbrowser
@@ -1,7 +1,28 @@
 """Tests para la aplicación DiscoCLI"""
+import io
+import time
 import pytest
+import requests
 from click.testing import CliRunner
-from discocli import cli, obtener_episodios, formatear_salida
+from requests_cache import CachedSession, DO_NOT_CACHE, EXPIRE_IMMEDIATELY
+from selectolax.lexbor import LexborHTMLParser
+from urllib3 import HTTPResponse
+from urllib3.exceptions import ProtocolError
+import discocli
+from discocli import cli, obtener_episodios, formatear_salida, validar_fecha, Episodio, _total_paginas
+
+class RespuestaFalsa:
+    """Respuesta HTTP mínima para probar el análisis sin acceso a la red."""
+
+    def __init__(self, html="", status_code=200, headers=None, encoding="utf-8"):
+        self.content = html.encode(encoding)
+        self.text = html
+        self.encoding = encoding if "charset" in (headers or {}).get("Content-Type", "") else "ISO-8859-1"
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
 
 @pytest.fixture
 def runner():
@@ -67,4 +88,269 @@ def test_formatear_salida_json(episodios_ejemplo):
 def test_formatear_salida_csv(episodios_ejemplo):
     """Prueba la función de formateo en CSV."""
     resultado = formatear_salida(episodios_ejemplo, 'csv')
-    assert "titulo,fecha" in resultado 
\ No newline at end of file
+    assert "titulo,fecha" in resultado 
+
+@pytest.fixture
+def episodios_fijos():
+    """Fixture con episodios fijos que no requieren acceso a la red."""
+    return [
+        Episodio(id="1", titulo="10939. Primero", url="https://example.com/1",
+                 fecha="01/03/2020", duracion="50 min", descripcion="Desc, con coma"),
+        Episodio(id="2", titulo="10940. Segundo", fecha="02/03/2020"),
+    ]
+
+def test_formatear_salida_texto_omite_campos_vacios(episodios_fijos):
+    """Prueba que el formato texto solo muestra los campos con valor."""
+    resultado = formatear_salida(episodios_fijos, 'texto')
+    assert resultado.split("\n") == [
+        "Título: 10939. Primero",
+        "Fecha: 01/03/2020",
+        "Duración: 50 min",
+        "Descripción: Desc, con coma",
+        "URL: https://example.com/1",
+        "-" * 40,
+        "Título: 10940. Segundo",
+        "Fecha: 02/03/2020",
+        "-" * 40,
+    ]
+
+@pytest.mark.parametrize("mes,anio,esperado", [
+    (1, 2008, False),
+    (2, 2008, True),
+    (12, 2015, True),
+    (6, 2021, True),
+    (7, 2021, False),
+])
+def test_validar_fecha_limites(mes, anio, esperado):
+    """Prueba los límites del rango de emisión."""
+    assert validar_fecha(mes, anio) is esperado
+
+def test_formatear_salida_csv_columnas_fijas(episodios_fijos):
+    """Prueba que el CSV usa columnas fijas aunque falten campos."""
+    resultado = formatear_salida(episodios_fijos, 'csv')
+    assert resultado.splitlines() == [
+        "id,titulo,url,fecha,duracion,descripcion",
+        '1,10939. Primero,https://example.com/1,01/03/2020,50 min,"Desc, con coma"',
+        "2,10940. Segundo,,02/03/2020,,",
+    ]
+
+def test_formatear_salida_json_episodios(episodios_fijos):
+    """Prueba que el JSON serializa los campos de cada Episodio."""
+    resultado = formatear_salida(episodios_fijos, 'json')
+    assert '"titulo": "10939. Primero"' in resultado
+    assert '"descripcion": ""' in resultado
+
+def test_buscar_episodio_devuelve_el_mes_mas_antiguo(monkeypatch):
+    """Prueba que, con números repetidos, gana el mes más antiguo aunque termine después."""
+
+    def obtener_falso(mes, anio):
+        if (mes, anio) == (2, 2008):
+            time.sleep(0.2)
+            return [Episodio(titulo="100. Antiguo")]
+        if (mes, anio) == (3, 2008):
+            return [Episodio(titulo="1.00. Reciente")]
+        return []
+
+    monkeypatch.setattr(discocli, "obtener_episodios", obtener_falso)
+    assert discocli.buscar_episodio_por_numero("100").titulo == "100. Antiguo"
+    assert discocli.buscar_episodio_por_numero("999") is None
+
+def test_buscar_episodio_no_espera_a_los_meses_pendientes_tras_un_error(monkeypatch):
+    """Prueba que un error inesperado en un mes cancela los meses pendientes."""
+    consultados = []
+
+    def obtener_falso(mes, anio):
+        consultados.append((mes, anio))
+        if (mes, anio) == (2, 2008):
+            raise ValueError("página inesperada")
+        time.sleep(0.01)
+        return []
+
+    monkeypatch.setattr(discocli, "obtener_episodios", obtener_falso)
+    with pytest.raises(ValueError):
+        discocli.buscar_episodio_por_numero("100")
+    assert len(consultados) < len(discocli.MESES)
+
+def test_obtener_pagina_conserva_espacios_del_marcado(monkeypatch):
+    """Prueba que el texto con etiquetas anidadas mantiene sus espacios."""
+    html = (
+        '<ul><li class="elem_" data-setup=\'{"idAsset": 123}\'>'
+        '<span class="maintitle">10939. Hola <b>mundo</b> final</span>'
+        '<p class="description"> Con <i>cursiva</i> dentro </p></li></ul>'
+    )
+    monkeypatch.setattr(discocli.SESSION, "get", lambda url, **kw: RespuestaFalsa(html))
+    episodios, hay_siguiente, _ = discocli._obtener_pagina(3, 2020, 1)
+    assert episodios[0].titulo == "10939. Hola mundo final"
+    assert episodios[0].descripcion == "Con cursiva dentro"
+    assert episodios[0].id == "123"
+    assert not hay_siguiente
+
+def test_reintentos_usan_jitter_multiplicativo():
+    """Prueba que el adaptador y la descarga escalan la espera por (1 + U(0, JITTER))."""
+    for _ in range(100):
+        assert 4.0 <= discocli._con_jitter(4.0) <= 4.0 * (1 + discocli.JITTER)
+    assert discocli._con_jitter(1000.0) == discocli.ESPERA_MAXIMA
+
+    reintento = discocli.retry
+    for _ in range(3):
+        reintento = reintento.increment(method="GET", url="/", error=ProtocolError("cortada"))
+    espera_base = discocli.ESPERA_BASE * 2 ** 2
+    assert espera_base <= reintento.get_backoff_time() <= espera_base * (1 + discocli.JITTER)
+
+class DescargaFalsa:
+    """Respuesta en streaming cuyo cuerpo se corta tras el primer bloque."""
+
+    def __init__(self):
+        self.headers = {"content-length": "6"}
+        self.raw = self
+        self.decode_content = False
+        self.leidos = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def read(self, tamanio):
+        self.leidos += 1
+        if self.leidos > 1:
+            raise ProtocolError("conexión cortada")
+        return b"abc"
+
+def test_descargar_episodio_borra_archivo_parcial(monkeypatch, tmp_path):
+    """Prueba que tras agotar los reintentos no queda un MP3 truncado."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(discocli.time, "sleep", lambda segundos: None)
+    llamadas = []
+    monkeypatch.setattr(discocli.SESSION, "get",
+                        lambda url, **kw: llamadas.append(url) or DescargaFalsa())
+    with pytest.raises(ProtocolError):
+        discocli.descargar_episodio("https://example.com/a.mp3", "1")
+    assert len(llamadas) == discocli.MAX_REINTENTOS + 1
+    assert not (tmp_path / "Downloads" / "discopolis" / "discopolis_1.mp3").exists()
+
+def test_descargar_episodio_no_reintenta_fallos_de_conexion(monkeypatch, tmp_path):
+    """Prueba que los fallos de conexión se dejan al adaptador de la sesión."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    llamadas = []
+
+    def get_fallido(url, **kw):
+        llamadas.append(url)
+        raise requests.ConnectionError("sin conexión")
+
+    monkeypatch.setattr(discocli.SESSION, "get", get_fallido)
+    with pytest.raises(requests.ConnectionError):
+        discocli.descargar_episodio("https://example.com/a.mp3", "1")
+    assert len(llamadas) == 1
+
+@pytest.mark.parametrize("html,esperado", [
+    ('<div class="paginacion"><span class="total">Página 1 de 5</span></div>', 5),
+    ('<div class="paginacion"><a>1</a><a>2</a><a>3</a><a>Siguiente</a></div>', 3),
+    ('<div class="paginacion"><a>Siguiente</a></div>', None),
+    ('<ul></ul>', None),
+])
+def test_total_paginas(html, esperado):
+    """Prueba la lectura del total de páginas del paginador."""
+    assert _total_paginas(LexborHTMLParser(html)) == esperado
+
+def paginador_falso(ultima_pagina, total_visible):
+    """Devuelve un _obtener_pagina falso con un paginador de ventana."""
+    pedidas = []
+
+    def obtener_pagina(mes, anio, page):
+        pedidas.append(page)
+        if page > ultima_pagina:
+            return [], False, None
+        total = min(page + total_visible - 1, ultima_pagina)
+        return [Episodio(titulo=str(page))], page < ultima_pagina, total
+
+    return obtener_pagina, pedidas
+
+@pytest.mark.parametrize("ultima_pagina,total_visible", [(1, 1), (5, 5), (6, 3), (9, 1)])
+def test_iter_episodios_sigue_el_enlace_siguiente(monkeypatch, ultima_pagina, total_visible):
+    """Prueba que el total del paginador no trunca el mes ni lo alarga."""
+    obtener_pagina, pedidas = paginador_falso(ultima_pagina, total_visible)
+    monkeypatch.setattr(discocli, "_obtener_pagina", obtener_pagina)
+    titulos = [ep.titulo for ep in discocli.iter_episodios(3, 2020)]
+    assert titulos == [str(p) for p in range(1, ultima_pagina + 1)]
+    if total_visible == ultima_pagina:
+        assert sorted(pedidas) == list(range(1, ultima_pagina + 1))
+
+def test_iter_episodios_limita_el_total_del_paginador(monkeypatch):
+    """Prueba que un total exagerado en el paginador no dispara cientos de peticiones."""
+    pedidas = []
+
+    def obtener_pagina(mes, anio, page):
+        pedidas.append(page)
+        if page > 3:
+            return [], False, 500
+        return [Episodio(titulo=str(page))], page < 3, 500
+
+    monkeypatch.setattr(discocli, "_obtener_pagina", obtener_pagina)
+    titulos = [ep.titulo for ep in discocli.iter_episodios(3, 2020)]
+    assert titulos == ["1", "2", "3"]
+    assert len(pedidas) <= 1 + discocli.PAGINAS_POR_LOTE
+
+@pytest.mark.parametrize("ultima_pagina", [1, 2, 6])
+def test_iter_episodios_sin_paginador_no_pide_paginas_de_mas(monkeypatch, ultima_pagina):
+    """Prueba que sin total de páginas no se piden páginas tras la última."""
+    pedidas = []
+
+    def obtener_pagina(mes, anio, page):
+        pedidas.append(page)
+        return [Episodio(titulo=str(page))], page < ultima_pagina, None
+
+    monkeypatch.setattr(discocli, "_obtener_pagina", obtener_pagina)
+    titulos = [ep.titulo for ep in discocli.iter_episodios(3, 2020)]
+    assert titulos == [str(p) for p in range(1, ultima_pagina + 1)]
+    assert pedidas == list(range(1, ultima_pagina + 1))
+
+@pytest.mark.parametrize("html,headers", [
+    ('<meta charset="iso-8859-1"><ul><li class="elem_"><span class="maintitle">1. Canción</span></li></ul>', {}),
+    ('<ul><li class="elem_"><span class="maintitle">1. Canción</span></li></ul>',
+     {"Content-Type": "text/html; charset=ISO-8859-1"}),
+])
+def test_obtener_pagina_respeta_charset_no_utf8(monkeypatch, html, headers):
+    """Prueba que las páginas latin-1 se decodifican con su juego de caracteres."""
+    monkeypatch.setattr(discocli.SESSION, "get",
+                        lambda url, **kw: RespuestaFalsa(html, headers=headers, encoding="latin-1"))
+    episodios, _, _ = discocli._obtener_pagina(3, 2020, 1)
+    assert episodios[0].titulo == "1. Canción"
+
+class AdaptadorConEtag(requests.adapters.HTTPAdapter):
+    """Adaptador falso que responde 304 cuando recibe el ETag de la página."""
+
+    def __init__(self, html):
+        super().__init__()
+        self.html = html.encode("utf-8")
+        self.peticiones = []
+
+    def send(self, request, **kwargs):
+        self.peticiones.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            raw = HTTPResponse(body=io.BytesIO(b""), status=304,
+                               headers={"ETag": '"v1"'}, preload_content=False)
+        else:
+            raw = HTTPResponse(body=io.BytesIO(self.html), status=200,
+                               headers={"ETag": '"v1"', "Content-Type": "text/html; charset=utf-8"},
+                               preload_content=False)
+        return self.build_response(request, raw)
+
+def test_obtener_pagina_revalida_con_etag(monkeypatch):
+    """Prueba que la caché revalida con If-None-Match y aprovecha el 304."""
+    html = '<ul><li class="elem_"><span class="maintitle">10939. Caché</span></li></ul>'
+    sesion = CachedSession(backend="memory", expire_after=DO_NOT_CACHE,
+                           urls_expire_after={f"{discocli.BASE_URL.split('://', 1)[1]}*": EXPIRE_IMMEDIATELY})
+    adaptador = AdaptadorConEtag(html)
+    sesion.mount("https://", adaptador)
+    monkeypatch.setattr(discocli, "SESSION", sesion)
+
+    primera, _, _ = discocli._obtener_pagina(3, 2020, 1)
+    segunda, _, _ = discocli._obtener_pagina(3, 2020, 1)
+    assert [ep.titulo for ep in primera] == [ep.titulo for ep in segunda] == ["10939. Caché"]
+    assert "If-None-Match" not in adaptador.peticiones[0]
+    assert adaptador.peticiones[1].get("If-None-Match") == '"v1"'